@@ -1,23 +1,70 @@
 import hashlib
 import os
 import pickle
+import re
+from functools import lru_cache
+
 import nltk
 from nltk.corpus import stopwords
 
 from nltk.stem import WordNetLemmatizer
 
-nltk.download('stopwords')
-nltk.download('punkt_tab')
-nltk.download('wordnet')
+# Only download the corpora that are missing, so imports (also in worker processes) skip the download check
+for resource, path in [("stopwords", "corpora/stopwords"), ("wordnet", "corpora/wordnet")]:
+    try:
+        nltk.data.find(path)
+    except LookupError:
+        nltk.download(resource, quiet=True)
 nltk_stopwords = set(stopwords.words('english'))
 SKIPWORDS = {"cindy", "jenkins", "enron", "u"}
 SKIPWORDS.update(nltk_stopwords)
 
+_LEMMATIZER = WordNetLemmatizer()
+_STOPWORDS_FROZEN = frozenset(SKIPWORDS)
+_STOPWORDS_PLAIN = frozenset(nltk_stopwords)
+# Purely alphabetic Treebank tokens, replaces word_tokenize followed by the isalpha() filter.
+# Tokens are delimited by whitespace and the characters Treebank splits off; a token only counts if it is
+# letters, optionally wrapped in punctuation or followed by a contraction suffix (don't -> do, it's -> it).
+# Letters inside mixed tokens (URLs, e-mail domains, codes such as covid19) are dropped as before.
+_TOKEN_BOUNDARY = r"""\s;@#$%&?!()\[\]{}<>":,"""
+_TOKEN_RE = re.compile(
+    rf"(?:^|(?<=[{_TOKEN_BOUNDARY}]))[^\w\s]*([^\W\d_]+)(?:n't|'(?:s|m|d|ll|re|ve))?[^\w\s]*(?=$|[{_TOKEN_BOUNDARY}])"
+)
+
+
+@lru_cache(maxsize=200_000)
+def _lem(token):
+    """Lemmatize a token, memoized across messages and loaders."""
+    return _LEMMATIZER.lemmatize(token)
+
+
+@lru_cache(maxsize=65536)
+def _process_one(message, use_skipwords):
+    """Tokenize, lemmatize and stopword-filter a single message body, memoized for recurring templates."""
+    stop_words = _STOPWORDS_FROZEN if use_skipwords else _STOPWORDS_PLAIN
+    lemmas = (_lem(token) for token in _TOKEN_RE.findall(message.lower()))
+    return ' '.join(lemma for lemma in lemmas if lemma not in stop_words)
+
+
+def preprocess_messages(messages, use_skipwords=True, keep_raw=False):
+    """
+    Preprocess a list of messages, keeping the original text under 'raw_body' if keep_raw is set.
+    Module level so worker processes can run it without the loader instance.
+    """
+    filtered_messages = [msg for msg in messages if msg.get('body') is not None and msg.get('body') != '']
+    for msg in filtered_messages:
+        if keep_raw:
+            msg['raw_body'] = msg['body']
+        msg['body'] = _process_one(msg['body'], use_skipwords)
+    return filtered_messages
+
+
 class BaseDatasetLoader:
     def __init__(self, data_dir: str, label: str, sample_size: int = None, dataset_name: str = None,
-                 use_skipwords: bool = True):
+                 use_skipwords: bool = True, keep_raw_body: bool = False):
         """
         Initialize the dataset loader.
+        :param keep_raw_body: Flag to keep the unprocessed message text under 'raw_body'
         """
         self.data_dir = data_dir
         self.label = label
@@ -29,8 +76,10 @@ class BaseDatasetLoader:
         self.conversation_lengths = []
         self.vocab = set()
         self.use_skipwords = use_skipwords
+        self.keep_raw_body = keep_raw_body
 
         self.cache_dir = os.path.join('data_loading_cache', self.dataset_name)
+        self._cache_filenames = {}
         os.makedirs(self.cache_dir, exist_ok=True)
 
     def load_data(self, force_reload=False, random_state=42, all_messages=False):
@@ -48,15 +97,18 @@ class BaseDatasetLoader:
 
     def get_cache_filename(self, random_state=42, all_messages=False):
         """Generate a unique cache filename based on configuration."""
-        config_str = f"{self.data_dir}_{self.label}_{self.sample_size}_{self.use_skipwords}_{random_state}_{all_messages}"
-        config_hash = hashlib.md5(config_str.encode()).hexdigest()
-        filename = os.path.join(self.cache_dir, f"data_{config_hash}.pkl")
+        config_str = f"{self.data_dir}_{self.label}_{self.sample_size}_{self.use_skipwords}_{random_state}_{all_messages}_{self.keep_raw_body}"
+        filename = self._cache_filenames.get(config_str)
+        if filename is None:
+            config_hash = hashlib.blake2b(config_str.encode(), digest_size=16).hexdigest()
+            filename = os.path.join(self.cache_dir, f"data_{config_hash}.pkl")
+            self._cache_filenames[config_str] = filename
         return filename
 
     def save_to_cache(self, cache_file):
         """Save data to cache."""
         with open(cache_file, 'wb') as f:
-            pickle.dump(self.data, f)
+            pickle.dump(self.data, f, protocol=pickle.HIGHEST_PROTOCOL)
 
     def load_from_cache(self, cache_file):
         """Load data from cache."""
@@ -64,31 +116,10 @@ class BaseDatasetLoader:
             data = pickle.load(f)
         return data
 
-    def preprocess_messages(self, messages):
-        """Preprocess a list of messages."""
-        filtered_messages = [msg for msg in messages if msg.get('body') is not None and msg.get('body') != '']
-        message_bodies = [msg['body'] for msg in filtered_messages]
-        for msg in filtered_messages:
-            msg['raw_body'] = msg['body']
-        processed_bodies = self.preprocess_message_bodies(message_bodies)
-        for idx, msg in enumerate(filtered_messages):
-            msg['body'] = processed_bodies[idx]
-        return filtered_messages
+    def preprocess_messages(self, messages, keep_raw=False):
+        """Preprocess a list of messages, keeping the original text under 'raw_body' if keep_raw is set."""
+        return preprocess_messages(messages, self.use_skipwords, keep_raw)
 
     def preprocess_message_bodies(self, messages):
         """Preprocess a list of message bodies."""
-        lemmatizer = WordNetLemmatizer()
-        if self.use_skipwords:
-            stop_words = set(SKIPWORDS)
-        else:
-            stop_words = set(stopwords.words('english'))
-        processed_messages = []
-
-        for message in messages:
-            tokens = nltk.word_tokenize(message.lower())
-            tokens = [lemmatizer.lemmatize(token) for token in tokens if token.isalpha()]
-            tokens = [token for token in tokens if token not in stop_words]
-            processed_message = ' '.join(tokens)
-            processed_messages.append(processed_message)
-
-        return processed_messages
\ No newline at end of file
+        return [_process_one(message, self.use_skipwords) for message in messages]
\ No newline at end of file
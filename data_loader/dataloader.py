@@ -1,7 +1,8 @@
+import math
 import random
 from typing import List
 
-from sklearn.model_selection import train_test_split
+import numpy as np
 
 from data_loader.base_dataset_loader import BaseDatasetLoader
 
@@ -29,10 +30,14 @@ class DataLoader:
             loader.load_data(force_reload=force_reload, random_state=self.random_state, all_messages=all_messages)
             if 'all' in loader.data:
                 all_data = loader.data['all']
-                train_data, test_data = train_test_split(
-                    all_data, test_size=self.test_size, random_state=self.random_state)
-                train_data, val_data = train_test_split(
-                    train_data, test_size=self.val_size / (1 - self.test_size), random_state=self.random_state)
+                # Single shuffle of the indices, then cut into test, val and train
+                n = len(all_data)
+                idx = np.random.default_rng(self.random_state).permutation(n)
+                n_test = math.ceil(n * self.test_size)
+                n_val = math.ceil((n - n_test) * (self.val_size / (1 - self.test_size)))
+                test_data = [all_data[i] for i in idx[:n_test]]
+                val_data = [all_data[i] for i in idx[n_test:n_test + n_val]]
+                train_data = [all_data[i] for i in idx[n_test + n_val:]]
                 loader.data = {'train': train_data, 'val': val_data, 'test': test_data}
             else:
                 pass
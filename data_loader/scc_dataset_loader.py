@@ -1,21 +1,70 @@
-import json
 import os
 import random
 import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-from data_loader.base_dataset_loader import BaseDatasetLoader
+import orjson
+
+from data_loader.base_dataset_loader import BaseDatasetLoader, preprocess_messages
+
+_EXCLUDED_MEDIA = frozenset({"Instagram", "Telegram"})
+# File description header added by the dataset creators, followed by the numbered file descriptors
+_FILE_DESC_RE = re.compile(
+    re.escape("This message contains files. If the description for a file does not make sense, ignore it."
+              "Here are descriptions of those files:\nDescription for file 1:")
+    + r"|Description for file \d+:"
+)
+
+
+def _iter_json_files(root):
+    """Recursively yield the paths of all JSON files below root without materializing directory listings."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_json_files(entry.path)
+            elif entry.name.endswith('.json'):
+                yield entry.path
+
+
+def _process_one_file(file_path, all_messages, label, dataset_name, use_skipwords, keep_raw_body):
+    """
+    Load and preprocess a single conversation file in a worker process.
+    Only plain arguments are passed, so the loader (and its loaded data) is never pickled per task.
+    :return: conversation dict or None if the conversation is filtered out
+    """
+    with open(file_path, 'rb') as f:
+        convo = orjson.loads(f.read())
+    messages = convo.get('messages', [])
+    if not all_messages:
+        # Only keep messages from Email
+        if any(msg.get("medium") in _EXCLUDED_MEDIA for msg in messages):
+            return None
+        # Only keep scammers messages
+        messages = [msg for msg in messages if msg.get("is_inbound")]
+    messages = SCCDatasetLoader.remove_file_description(messages)
+    messages = preprocess_messages(messages, use_skipwords, keep_raw=keep_raw_body)
+    return {
+        'messages': messages,
+        'label': label,
+        'dataset': dataset_name,
+    }
 
 
 class SCCDatasetLoader(BaseDatasetLoader):
     def __init__(self, data_dir: str, train_data_dir: str, test_data_dir: str, sample_size: int = None,
-                 use_skipwords: bool = True, random_state: int = 42):
+                 use_skipwords: bool = True, random_state: int = 42, n_workers: int = None,
+                 keep_raw_body: bool = False):
         """
         Initialize the SCC dataset loader
+        :param n_workers: Number of processes used to load and preprocess the files, defaults to the CPU count
         """
         self.test_data_dir = test_data_dir
+        self.n_workers = n_workers or os.cpu_count()
         random.seed(random_state)
         self.train_data_dir = train_data_dir
-        super().__init__(data_dir=data_dir, label="scam", sample_size=sample_size, use_skipwords=use_skipwords)
+        super().__init__(data_dir=data_dir, label="scam", sample_size=sample_size, use_skipwords=use_skipwords,
+                         keep_raw_body=keep_raw_body)
 
     def process_data(self, all_messages=False):
         """
@@ -24,35 +73,21 @@ class SCCDatasetLoader(BaseDatasetLoader):
         :return: directory with train and test data splits
         """
         splits = {"train": self.train_data_dir, "test": self.test_data_dir}
+        load_conversation = partial(_process_one_file, all_messages=all_messages, label=self.label,
+                                    dataset_name=self.dataset_name, use_skipwords=self.use_skipwords,
+                                    keep_raw_body=self.keep_raw_body)
         return_data = {}
-        for split_name, split in splits.items():
-            split_path = os.path.join(self.data_dir, split)
-            conversations = []
-            for root, _, files in os.walk(split_path):
-                for filename in files:
-                    if filename.endswith('.json'):
-                        file_path = os.path.join(root, filename)
-                        with open(file_path, 'r') as f:
-                            convo = json.load(f)
-                            messages = convo.get('messages', [])
-                            if not all_messages:
-                                # Only keep messages from Email
-                                if any(msg.get("medium") in ["Instagram", "Telegram"] for msg in messages):
-                                    continue
-                                # Only keep scammers messages
-                                messages = [msg for msg in messages if msg.get("is_inbound")]
-                            messages = self.remove_file_description(messages)
-                            messages = self.preprocess_messages(messages)
-                            conversation = {
-                                'messages': messages,
-                                'label': self.label,
-                                'dataset': self.dataset_name,
-                            }
-                            conversations.append(conversation)
-            # Apply sampling if specified
-            if self.sample_size and len(conversations) > self.sample_size:
-                conversations = random.sample(conversations, self.sample_size)
-            return_data[split_name] = conversations
+        with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+            for split_name, split in splits.items():
+                split_path = os.path.join(self.data_dir, split)
+                # Files are independent, so they are loaded and preprocessed in parallel
+                file_paths = _iter_json_files(split_path)
+                conversations = [convo for convo in executor.map(load_conversation, file_paths, chunksize=32)
+                                 if convo is not None]
+                # Apply sampling if specified
+                if self.sample_size and len(conversations) > self.sample_size:
+                    conversations = random.sample(conversations, self.sample_size)
+                return_data[split_name] = conversations
         return return_data
 
     @staticmethod
@@ -65,12 +100,6 @@ class SCCDatasetLoader(BaseDatasetLoader):
                 text = message['body']
                 if text == "" or text is None:
                     continue
-                text = text.replace(
-                    "This message contains files. If the description for a file does not make sense, ignore it."
-                    "Here are descriptions of those files:\nDescription for file 1:",
-                    ""
-                )
-                text = re.sub(r'Description for file \d+:', '', text)
                 # Update the message text
-                message['body'] = text
+                message['body'] = _FILE_DESC_RE.sub('', text)
         return messages
\ No newline at end of file
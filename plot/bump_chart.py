@@ -1,12 +1,16 @@
+import heapq
+import itertools
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-import itertools
+from matplotlib.collections import LineCollection
 
 
 def prepare_time_dfs(data_points, top_k=10):
     time_dfs = []
     for i, d in enumerate(data_points):
-        top_k_tok = sorted(d["burst"], key=lambda x: x["ratio"], reverse=True)[:top_k]
+        top_k_tok = heapq.nlargest(top_k, d["burst"], key=lambda x: x["ratio"])
         burst_dict = {b["representative"]: b["ratio"] for b in top_k_tok}
         df = pd.DataFrame(list(burst_dict.items()), columns=["term", f"time_{i}"]).set_index("term")
         time_dfs.append(df)
@@ -15,37 +19,50 @@ def prepare_time_dfs(data_points, top_k=10):
 
 def compute_ranks(time_dfs):
     df_all = pd.concat(time_dfs, axis=1, sort=False)
-    ranks = df_all.rank(axis=0, ascending=False, method="first")
-    return ranks
+    arr = df_all.to_numpy(dtype=float)
+    # Stable descending argsort ranks ties by order of appearance (pandas' method="first"), NaNs sort last
+    order = np.argsort(-arr, axis=0, kind="stable")
+    ranks = np.empty_like(arr)
+    np.put_along_axis(ranks, order, np.arange(1, arr.shape[0] + 1, dtype=float)[:, None], axis=0)
+    ranks[np.isnan(arr)] = np.nan
+    return pd.DataFrame(ranks, index=df_all.index, columns=df_all.columns)
 
 
 def plot_segments(ranks, ax):
     unique_terms = ranks.index.tolist()
     color_map = {term: c for term, c in zip(unique_terms, itertools.cycle(plt.cm.tab20.colors))}
-    col_name_to_idx = {col: idx for idx, col in enumerate(ranks.columns)}
-
-    for term in ranks.index:
-        vals = ranks.loc[term]
-        valid = vals.notna() & (vals <= 10)
-        if not valid.any():
+    arr = ranks.to_numpy(dtype=float)
+    present = ~np.isnan(arr)
+    total_counts = present.sum(axis=1)
+    valid_mask = present & (arr <= 10)
+
+    # All runs go into one LineCollection and one scatter per marker shape instead of an artist per run
+    segments, segment_colors = [], []
+    points_by_marker = {}
+    for row_idx, term in enumerate(unique_terms):
+        valid_idx = np.flatnonzero(valid_mask[row_idx])
+        if valid_idx.size == 0:
             continue
         color = color_map[term]
-        segment_x, segment_y = [], []
-        total_count = ranks.loc[term].count()
-        marker = get_marker_by_count(total_count)
-        for col_name, v in zip(vals.index, vals):
-            if valid[col_name]:
-                segment_x.append(col_name_to_idx[col_name])  # Use numeric index
-                segment_y.append(v)
-            else:
-                if segment_x:
-                    ax.plot(segment_x, segment_y, marker=marker, linewidth=2, color=color)
-                    add_labels(ax, segment_x, segment_y, term)
-                    segment_x, segment_y = [], []
-        if segment_x:
-            ax.plot(segment_x, segment_y, marker=marker, linewidth=2, color=color)
+        marker = get_marker_by_count(total_counts[row_idx])
+        xs, ys, colors = points_by_marker.setdefault(marker, ([], [], []))
+        # Split the valid time points into contiguous runs, one line per run
+        breaks = np.flatnonzero(np.diff(valid_idx) != 1) + 1
+        for segment_x in np.split(valid_idx, breaks):
+            segment_y = arr[row_idx, segment_x]
+            segments.append(np.column_stack([segment_x, segment_y]))
+            segment_colors.append(color)
+            xs.extend(segment_x)
+            ys.extend(segment_y)
+            colors.extend([color] * len(segment_x))
             add_labels(ax, segment_x, segment_y, term)
 
+    if segments:
+        ax.add_collection(LineCollection(segments, colors=segment_colors, linewidths=2))
+    for marker, (xs, ys, colors) in points_by_marker.items():
+        ax.scatter(xs, ys, marker=marker, c=colors, zorder=3)  # markers on top of the lines, as with ax.plot
+    ax.autoscale_view()
+
 
 def add_labels(ax, segment_x, segment_y, term):
     if len(segment_x) == 1:
@@ -1,8 +1,10 @@
-import json
+import math
 from collections import Counter
-from typing import Iterable, Iterator, List, Dict, Set
+from typing import BinaryIO, Iterable, Iterator, List, Dict
 
 import click
+import numpy as np
+import orjson
 
 from data_loader.dataloader import DataLoader
 from data_loader.scc_dataset_loader import SCCDatasetLoader
@@ -26,12 +28,16 @@ def iter_preprocessed_messages(
     ]
 
     if sort_by_time:
-        messages.sort(key=lambda m: m.get("time", float("inf")))
+        # Sort on a flat array of timestamps instead of calling a key function per dict
+        times = np.fromiter((m.get("time", math.inf) for m in messages), dtype=np.float64, count=len(messages))
+        order = np.argsort(times, kind="stable")
+    else:
+        order = range(len(messages))
 
-    for i, msg in enumerate(messages):
+    for i, idx in enumerate(order):
         if limit is not None and i >= limit:
             break
-        yield msg["body"]
+        yield messages[idx]["body"]
 
 
 
@@ -88,7 +94,7 @@ def iter_preprocessed_messages(
     "show_text",
     default=False,
     show_default=True,
-    help="Include original message text in the final aggregated output.",
+    help="Include a JSON line per processed message with its text and detector outputs.",
 )
 @click.option(
     "--exclude-duplicates/--include-duplicates",
@@ -111,6 +117,13 @@ def iter_preprocessed_messages(
     show_default=True,
     help="Number of top frequent tokens to report in analysis.",
 )
+@click.option(
+    "--output",
+    type=click.File("wb"),
+    default="-",
+    show_default=True,
+    help="File to write the JSON lines output to.",
+)
 def main(
         data_dir: str,
         train_subdir: str,
@@ -123,11 +136,16 @@ def main(
         exclude_duplicates: bool,
         update_interval: int,
         top_frequency: int,
+        output: BinaryIO,
 ) -> None:
     """
     Load preprocessed messages using the dataloader and stream them through the detectors.
-    Outputs aggregated statistics with periodic snapshots every N messages.
+    Streams JSON lines: periodic snapshots every N messages (and per-message records with --show-text),
+    followed by a final aggregated summary.
     """
+    def write_record(record_type: str, record: Dict) -> None:
+        output.write(orjson.dumps({"type": record_type, **record}) + b"\n")
+
     # Initialize dataset loader and dataloader
     dataset_loader = SCCDatasetLoader(
         data_dir=data_dir,
@@ -149,16 +167,16 @@ def main(
     excluded = 0
     duplicate_count = 0
     duplicate_score_sum = 0.0
-    messages_out: List[Dict] = []
 
-    # Periodic snapshots
+    # Periodic snapshots, kept for the bump chart
     snapshots: List[Dict] = []
-    recent_tokens: Set[str] = set()
+    # Token counts since the last periodic update
+    recent_tokens: Counter = Counter()
 
 
     for text in iter_preprocessed_messages(conversations, limit=max_messages):
-        # Process message
-        out = pipeline.process_message(text, frequency_queries=None)
+        # Process message, the per-message burst result is only reported with --show-text
+        out = pipeline.process_message(text, frequency_queries=None, detect_bursts=show_text)
 
         dup_info = out.get("duplicate", {}) or {}
         is_duplicate = dup_info.get("is_duplicate", False)
@@ -180,13 +198,7 @@ def main(
         recent_tokens.update(tokens)
 
         if show_text:
-            messages_out.append(
-                {
-                    "text": text,
-                    "duplicate": dup_info,
-                    "burst": last_burst,
-                }
-            )
+            write_record("message", {"text": text, "duplicate": dup_info, "burst": last_burst})
 
         processed += 1
 
@@ -206,6 +218,7 @@ def main(
                 "duplicates_so_far": duplicate_count,
             }
             snapshots.append(snapshot)
+            write_record("snapshot", snapshot)
 
             # Clear recent tokens for next period
             recent_tokens.clear()
@@ -235,14 +248,11 @@ def main(
             "rate": (duplicate_count / processed) if processed else 0.0,
             "avg_score": (duplicate_score_sum / processed) if processed else 0.0,
         },
-        "periodic_snapshots": snapshots,
         "final burst": final_burst,
         "final top_tokens": final_top_tokens,
     }
-    if show_text:
-        summary["messages"] = messages_out
-
-    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    write_record("summary", summary)
+    output.flush()
 
     plot_bump_chart(snapshots, nr_msg_per_step=update_interval, top_k=5)
 
@@ -2,7 +2,7 @@
 Streaming algorithms and detectors for real-time message analysis.
 
 This package provides:
-- algorithms: Count-Min Sketch, DGIM, Bloom Filter
+- algorithms: Count-Min Sketch (plain and 4-bit packed), DGIM, Bloom Filter
 - detectors: frequency, burst, duplicate detection
 - streaming_pipeline: Orchestration for processing message streams
 """
@@ -1,5 +1,6 @@
 from .count_min_sketch import CountMinSketch
+from .count_min_sketch4 import CountMinSketch4
 from .dgim import DGIMManager
 from .bloom_filter import BloomFilter
 
-__all__ = ["CountMinSketch", "DGIMManager", "BloomFilter"]
+__all__ = ["CountMinSketch", "CountMinSketch4", "DGIMManager", "BloomFilter"]
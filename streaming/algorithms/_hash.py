@@ -0,0 +1,29 @@
+from typing import List, Tuple
+
+import numpy as np
+import xxhash
+
+MASK64 = (1 << 64) - 1
+
+
+def to_bytes(item) -> bytes:
+    """Encode an item for hashing; bytes are passed through unchanged."""
+    if isinstance(item, (bytes, bytearray)):
+        return item
+    return str(item).encode("utf-8", errors="ignore")
+
+
+def hash128(item_bytes: bytes, seed: int = 0) -> Tuple[int, int]:
+    """
+    Shared non-cryptographic hash primitive of the sketches: xxh3_128 split into (low, high) 64-bit halves.
+    """
+    h = xxhash.xxh3_128_intdigest(item_bytes, seed=seed)
+    return h & MASK64, h >> 64
+
+
+def hash128_many(items_bytes: List[bytes], seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """hash128 of a batch of items as (low, high) uint64 arrays."""
+    hashes = [xxhash.xxh3_128_intdigest(b, seed=seed) for b in items_bytes]
+    lo = np.fromiter((h & MASK64 for h in hashes), dtype=np.uint64, count=len(hashes))
+    hi = np.fromiter((h >> 64 for h in hashes), dtype=np.uint64, count=len(hashes))
+    return lo, hi
@@ -1,6 +1,12 @@
-import hashlib
 import math
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from streaming.algorithms._hash import hash128, hash128_many, to_bytes
+
+# Number of set bits for every possible byte value
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
 
 
 class BloomFilter:
@@ -10,67 +16,124 @@ class BloomFilter:
     Parameters:
       capacity: expected number of elements to store
       error_rate: desired false positive rate (e.g., 0.01)
+      shards: number of sub-filters (power of two). Each item is routed to one shard by its hash and all
+        its k bits land in that shard, so an operation touches a small, cache-resident region instead of k
+        random positions in the whole array. Sharding raises the false positive rate slightly.
 
     Methods:
-      add(item), __contains__(item), add_many(items), fill_ratio
+      add(item), __contains__(item), add_many(items), contains_many(items), fill_ratio
+      add_many_hashed(h1, h2), contains_many_hashed(h1, h2): batch variants taking precomputed base hashes
     """
 
-    def __init__(self, capacity: int, error_rate: float = 0.01, seed: int = 0) -> None:
+    def __init__(self, capacity: int, error_rate: float = 0.01, seed: int = 0, shards: int = 1) -> None:
         if capacity <= 0:
             raise ValueError("capacity must be positive")
         if not (0 < error_rate < 1):
             raise ValueError("error_rate must be in (0,1)")
+        if shards <= 0 or shards & (shards - 1):
+            raise ValueError("shards must be a positive power of two")
         self.capacity = int(capacity)
         self.error_rate = float(error_rate)
         self.seed = int(seed)
         # Optimal number of bits and hash functions from https://www.eecs.harvard.edu/~michaelm/postscripts/rsa2008.pdf?utm_source=chatgpt.com
         m = -int(round(self.capacity * math.log(self.error_rate) / (math.log(2) ** 2)))
         k = max(1, int(round((m / self.capacity) * math.log(2))))
-        self.m = m
+        self.shards = int(shards)
+        self._shard_shift = 64 - (self.shards.bit_length() - 1)
+        # Shards are contiguous ranges of m_shard bits. m_shard is rounded up to a power of two (less than 2x
+        # over-allocation, the false positive rate only improves) so bit positions are a bitmask, not a modulo
+        self.m_shard = max(8, 1 << (-(-m // self.shards) - 1).bit_length())
+        self._shard_mask = self.m_shard - 1
+        self.m = self.m_shard * self.shards
         self.k = k
-        self._bits = bytearray((self.m + 7) // 8)
+        self._bits = np.zeros((self.m + 7) // 8, dtype=np.uint8)
+        self._probes = np.arange(self.k, dtype=np.uint64)
+        # Reused index buffer of the batch operations, grown on demand instead of allocated per call
+        self._scratch = np.empty(0, dtype=np.uint64)
 
     def _hashes(self, item: str):
-        if not isinstance(item, (bytes, bytearray)):
-            item_bytes = str(item).encode("utf-8", errors="ignore")
-        else:
-            item_bytes = item
+        return self._hashes_bytes(to_bytes(item))
+
+    def _hashes_bytes(self, item_bytes: bytes):
         # Use double hashing to derive k indices from https://www.eecs.harvard.edu/~michaelm/postscripts/rsa2008.pdf?utm_source=chatgpt.com
-        h1 = int.from_bytes(hashlib.blake2b(item_bytes, digest_size=16, key=b"h1").digest(), "big")
-        h2 = int.from_bytes(hashlib.blake2b(item_bytes, digest_size=16, key=b"h2").digest(), "big")
+        # The two base hashes are the halves of a single 128-bit non-cryptographic hash
+        h1, h2 = hash128(item_bytes, self.seed)
+        # The top bits of h2 select the shard (0 when unsharded)
+        base = (h2 >> self._shard_shift) * self.m_shard if self.shards > 1 else 0
+        # An odd step visits k distinct positions modulo the power of two shard size
+        h2 |= 1
+        mask = self._shard_mask
         for i in range(self.k):
-            yield (h1 + i * h2 + i*i) % self.m
+            yield base + ((h1 + i * h2) & mask)
+
+    def _indices(self, item: str) -> np.ndarray:
+        return self._indices_bytes(to_bytes(item))
+
+    def _indices_bytes(self, item_bytes: bytes) -> np.ndarray:
+        return np.fromiter(self._hashes_bytes(item_bytes), dtype=np.int64, count=self.k)
 
-    def _set_bit(self, idx: int) -> None:
-        byte_index = idx // 8
-        bit_index = idx % 8
-        self._bits[byte_index] |= (1 << bit_index)
+    def _indices_many_bytes(self, items_bytes: List[bytes]) -> np.ndarray:
+        """Flat array with the k indices of every item, item after item."""
+        return self._indices_hashed(*hash128_many(items_bytes, self.seed)).ravel()
 
-    def _get_bit(self, idx: int) -> bool:
-        byte_index = idx // 8
-        bit_index = idx % 8
-        return bool(self._bits[byte_index] & (1 << bit_index))
+    def _indices_hashed(self, h1: np.ndarray, h2: np.ndarray) -> np.ndarray:
+        """
+        (n_items, k) indices from uint64 arrays of the two base hashes, same values as _hashes_bytes.
+        The result is a view of the scratch buffer and is only valid until the next batch operation.
+        """
+        size = len(h1) * self.k
+        if self._scratch.size < size:
+            self._scratch = np.empty(max(size, 2 * self._scratch.size), dtype=np.uint64)
+        idxs = self._scratch[:size].reshape(len(h1), self.k)
+        np.multiply(self._probes, (h2 | np.uint64(1))[:, None], out=idxs)
+        np.add(idxs, h1[:, None], out=idxs)
+        np.bitwise_and(idxs, np.uint64(self._shard_mask), out=idxs)
+        if self.shards > 1:
+            np.add(idxs, ((h2 >> np.uint64(self._shard_shift)) * np.uint64(self.m_shard))[:, None], out=idxs)
+        # Indices are below m < 2^63, so the int64 view has the same values
+        return idxs.view(np.int64)
+
+    def _test_indices(self, idxs: np.ndarray) -> np.ndarray:
+        return ((self._bits[idxs >> 3] >> (idxs & 7)) & 1).astype(bool)
+
+    def _set_indices(self, idxs: np.ndarray) -> None:
+        # Set all bits in one vectorized scatter: byte index and bit mask per position
+        np.bitwise_or.at(self._bits, idxs >> 3, (1 << (idxs & 7)).astype(np.uint8))
 
     def add(self, item: str) -> None:
-        for idx in self._hashes(item):
-            self._set_bit(idx)
+        self._set_indices(self._indices(item))
 
     def add_many(self, items: Iterable[str]) -> None:
-        for it in items:
-            self.add(it)
+        """Add a batch of items with a single scatter over all their bit positions."""
+        items_bytes = [to_bytes(it) for it in items]
+        if items_bytes:
+            self._set_indices(self._indices_many_bytes(items_bytes))
+
+    def add_many_hashed(self, h1: np.ndarray, h2: np.ndarray) -> None:
+        """
+        Add a batch of items given as uint64 arrays of their two base hashes (e.g. derived from token hashes),
+        skipping the per-item string hash.
+        """
+        if len(h1):
+            self._set_indices(self._indices_hashed(h1, h2).ravel())
 
     def __contains__(self, item: str) -> bool:
-        return all(self._get_bit(idx) for idx in self._hashes(item))
+        return bool(self._test_indices(self._indices(item)).all())
+
+    def contains_many(self, items: Iterable[str]) -> np.ndarray:
+        """Boolean membership mask of a batch of items, with one gather over all their bit positions."""
+        items_bytes = [to_bytes(it) for it in items]
+        return self.contains_many_hashed(*hash128_many(items_bytes, self.seed))
+
+    def contains_many_hashed(self, h1: np.ndarray, h2: np.ndarray) -> np.ndarray:
+        """Boolean membership mask of a batch of items given as in add_many_hashed."""
+        if not len(h1):
+            return np.zeros(0, dtype=bool)
+        return self._test_indices(self._indices_hashed(h1, h2)).all(axis=1)
 
     @property
     def fill_ratio(self) -> float:
-        set_bits = 0
-        for b in self._bits:
-            # count bits in byte
-            v = b
-            # builtin bit_count in Python 3.8+
-            set_bits += int(v).bit_count()
-        return set_bits / self.m
+        return int(_POPCOUNT8[self._bits].sum(dtype=np.int64)) / self.m
 
     def __repr__(self) -> str:
-        return f"BloomFilter(capacity={self.capacity}, error_rate={self.error_rate:.4f}, m={self.m}, k={self.k})"
+        return f"BloomFilter(capacity={self.capacity}, error_rate={self.error_rate:.4f}, m={self.m}, k={self.k}, shards={self.shards})"
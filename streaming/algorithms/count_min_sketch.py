@@ -1,6 +1,9 @@
-import hashlib
 import math
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from streaming.algorithms._hash import hash128, hash128_many, to_bytes
 
 
 class CountMinSketch:
@@ -16,14 +19,16 @@ class CountMinSketch:
     def __init__(self, width: int, depth: int, seed: int = 0) -> None:
         if width <= 0 or depth <= 0:
             raise ValueError("width and depth must be positive")
-        self.width = int(width)
+        # Width is rounded up to a power of two (less than 2x over-allocation) so columns are a bitmask, not a modulo
+        self.width = 1 << (int(width) - 1).bit_length()
+        self._width_mask = self.width - 1
         self.depth = int(depth)
         self.seed = int(seed)
         # 2D table: depth rows, width columns
-        self.table = [[0] * self.width for _ in range(self.depth)]
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self._rows = np.arange(self.depth)
+        self._rows_u64 = self._rows.astype(np.uint64)
         self.total_count = 0
-        # Precompute per-row salts for hashing
-        self._salts = [hashlib.sha256(f"{self.seed}-{i}".encode()).digest() for i in range(self.depth)]
 
     @classmethod
     def from_error_delta(cls, epsilon: float, delta: float, seed: int = 0) -> "CountMinSketch":
@@ -38,17 +43,25 @@ class CountMinSketch:
         depth = math.ceil(math.log(1.0 / delta))
         return cls(width=width, depth=depth, seed=seed)
 
+    def _cols_all(self, item_bytes: bytes) -> np.ndarray:
+        """
+        Column index of the item in every row, derived from a single 128-bit hash by double hashing:
+        col_r = (h_lo + r * h_hi) mod width. h_hi is forced odd so the rows get distinct columns.
+        """
+        lo, hi = hash128(item_bytes, self.seed)
+        return ((lo + self._rows_u64 * (hi | 1)) & self._width_mask).astype(np.int64)
+
+    def _cols_many(self, items_bytes: List[bytes]) -> np.ndarray:
+        """Per-row columns of a batch of items as an (n_items, depth) array, same values as _cols_all."""
+        lo, hi = hash128_many(items_bytes, self.seed)
+        hi |= np.uint64(1)
+        return ((lo[:, None] + hi[:, None] * self._rows_u64) & self._width_mask).astype(np.int64)
+
     def _hash(self, item: str, row: int) -> int:
         """
-        Hash an item to a column index for the given row using row-specific salt.
+        Hash an item to a column index for the given row.
         """
-        if not isinstance(item, (bytes, bytearray)):
-            item_bytes = str(item).encode("utf-8", errors="ignore")
-        else:
-            item_bytes = item
-        h = hashlib.blake2b(item_bytes, digest_size=16, key=self._salts[row])
-        # Convert 16 bytes to integer then mod width
-        return int.from_bytes(h.digest(), "big") % self.width
+        return int(self._cols_all(to_bytes(item))[row])
 
     def add(self, item: str, count: int = 1) -> None:
         """Increment the count estimate for an item."""
@@ -56,25 +69,48 @@ class CountMinSketch:
             raise ValueError("count must be non-negative")
         if count == 0:
             return
-        for r in range(self.depth):
-            c = self._hash(item, r)
-            self.table[r][c] += count
+        self._add_cols(self._cols_all(to_bytes(item)), count)
+
+    def _add_cols(self, cols: np.ndarray, count: int = 1) -> None:
+        """Increment the counters at precomputed per-row columns (see _cols_all)."""
+        self.table[self._rows, cols] += count
         self.total_count += count
 
+    def add_batch(self, items_bytes: List[bytes], count: int = 1) -> np.ndarray:
+        """
+        Add a batch of encoded items with one scatter-add over all (row, column) pairs.
+        Returns the (n_items, depth) column matrix so callers can reuse it without re-hashing.
+        """
+        if count < 0:
+            raise ValueError("count must be non-negative")
+        cols = self._cols_many(items_bytes)
+        if count:
+            # np.add.at accumulates repeated items correctly, unlike fancy-index +=
+            np.add.at(self.table, (np.broadcast_to(self._rows, cols.shape), cols), count)
+            self.total_count += count * len(items_bytes)
+        return cols
+
     def add_many(self, items: Iterable[str], count: int = 1) -> None:
-        """Add multiple items with the same count."""
-        for it in items:
-            self.add(it, count=count)
+        """Add multiple items with the same count, hashed and scattered as one batch."""
+        self.add_batch([to_bytes(it) for it in items], count=count)
 
     def estimate(self, item: str) -> int:
         """
         Estimate the frequency of the item using min across rows.
         """
-        mins = []
-        for r in range(self.depth):
-            c = self._hash(item, r)
-            mins.append(self.table[r][c])
-        return min(mins) if mins else 0
+        return self._estimate_cols(self._cols_all(to_bytes(item)))
+
+    def estimate_many(self, items: Iterable[str]) -> np.ndarray:
+        """Estimates of several items as an int64 array, hashed and looked up in one batch."""
+        return self._estimate_cols_many(self._cols_many([to_bytes(it) for it in items]))
+
+    def _estimate_cols(self, cols: np.ndarray) -> int:
+        """Estimate from precomputed per-row columns (see _cols_all)."""
+        return int(self.table[self._rows, cols].min())
+
+    def _estimate_cols_many(self, cols: np.ndarray) -> np.ndarray:
+        """Estimates for an (n_items, depth) column matrix as returned by add_batch."""
+        return self.table[self._rows, cols].min(axis=1)
 
     def merge(self, other: "CountMinSketch") -> "CountMinSketch":
         """
@@ -84,19 +120,14 @@ class CountMinSketch:
             raise TypeError("other must be a CountMinSketch")
         if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
             raise ValueError("Cannot merge CMS with different width/depth/seed")
-        for r in range(self.depth):
-            row = self.table[r]
-            other_row = other.table[r]
-            for c in range(self.width):
-                row[c] += other_row[c]
+        self.table += other.table
         self.total_count += other.total_count
         return self
 
     @property
     def memory_bytes(self) -> int:
         """Approximate memory used by the table (counts only)."""
-        # Assuming small ints but in Python this is not strict; still a useful proxy: number of counters * 8 bytes
-        return self.width * self.depth * 8
+        return self.table.nbytes
 
     def __repr__(self) -> str:
         return f"CountMinSketch(width={self.width}, depth={self.depth}, total={self.total_count})"
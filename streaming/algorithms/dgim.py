@@ -1,58 +1,80 @@
 from collections import deque
 from typing import List, Tuple, Deque, Optional
 
+import numpy as np
+
 Bucket = Tuple[int, int]  # (timestamp, size)
 
 
 class DGIM:
-    """DGIM for a single stream of 1s."""
+    """
+    DGIM for a single stream of 1s.
+    The clock is owned by the caller (see DGIMManager) and passed in, so idle streams need no per-tick work.
+    """
+
+    # One instance per bin: no per-instance __dict__
+    __slots__ = ("window_size", "buckets", "total")
 
     def __init__(self, window_size: int):
         self.window_size = window_size
         self.buckets: Deque[Bucket] = deque()  # newest left
-        self.current_time = 0
+        # Running sum of the bucket sizes (merges keep it unchanged), answers full-window queries in O(1)
+        self.total = 0
 
-    def _expire(self):
-        expire_before = self.current_time - self.window_size + 1
+    def _expire(self, current_time: int):
+        expire_before = current_time - self.window_size + 1
         while self.buckets and self.buckets[-1][0] < expire_before:
-            self.buckets.pop()
+            self.total -= self.buckets.pop()[1]
 
     def _compress(self):
-        sizes_seen = {}
-        i = 0
-        while i < len(self.buckets):
-            _, size = self.buckets[i]
-            sizes_seen.setdefault(size, 0)
-            sizes_seen[size] += 1
-            if sizes_seen[size] == 3:
-                idxs = [j for j, (_, s) in enumerate(self.buckets) if s == size]
-                a, b = idxs[-2], idxs[-1]
-                t_new = self.buckets[a][0]
-                tmp = list(self.buckets)
-                tmp.pop(b)
-                tmp.pop(a)
-                tmp.insert(a, (t_new, size * 2))
-                self.buckets = deque(tmp)
-                sizes_seen = {}
-                i = 0
-                continue
-            i += 1
-
-    def add_one(self):
-        self.buckets.appendleft((self.current_time, 1))
+        # Sizes grow from the newest (left) to the oldest (right) end, so only the run of the size that just
+        # gained a bucket can overflow. Each merge cascades into the next size: O(log W) per add.
+        buckets = self.buckets
+        start, size = 0, 1
+        while start + 2 < len(buckets) and buckets[start + 2][1] == size:
+            # Three buckets of this size: merge the two oldest, keeping the newer timestamp
+            if start + 3 == len(buckets):
+                # The run ends at the oldest end of the deque: O(1) pop instead of a positional delete
+                buckets.pop()
+                buckets[-1] = (buckets[-1][0], size * 2)
+            else:
+                buckets[start + 1] = (buckets[start + 1][0], size * 2)
+                del buckets[start + 2]
+            start += 1
+            size *= 2
+
+    def add_one(self, current_time: int):
+        # Drop buckets that left the window since the last update before merging
+        self._expire(current_time)
+        self.buckets.appendleft((current_time, 1))
+        self.total += 1
         self._compress()
-        self._expire()
+        self._expire(current_time)
 
-    def tick(self):
-        self.current_time += 1
-        self._expire()
+    def add_ones(self, n: int, current_time: int):
+        """
+        Record n ones at the same timestamp, same buckets as n calls of add_one.
+        Expiry only depends on the timestamp, so it runs once around the whole batch.
+        """
+        self._expire(current_time)
+        appendleft = self.buckets.appendleft
+        compress = self._compress
+        for _ in range(n):
+            appendleft((current_time, 1))
+            compress()
+        self.total += n
+        self._expire(current_time)
 
-    def count_last(self, k: Optional[int] = None) -> int:
+    def count_last(self, current_time: int, k: Optional[int] = None) -> int:
         if k is None:
             k = self.window_size
         if k <= 0:
             return 0
-        threshold = self.current_time - k + 1
+        self._expire(current_time)
+        if k >= self.window_size:
+            # Every remaining bucket lies inside the query window
+            return self.total
+        threshold = current_time - k + 1
         total = 0
         for ts, size in self.buckets:
             if ts >= threshold:
@@ -68,13 +90,23 @@ class DGIMManager:
 
     def __init__(self, num_bins: int, window_size: int):
         self.dgims: List[DGIM] = [DGIM(window_size) for _ in range(num_bins)]
+        # Single clock shared by all bins, so a tick is O(1) instead of O(num_bins)
+        self.current_time = 0
 
     def tick(self):
-        for dgim in self.dgims:
-            dgim.tick()
+        self.current_time += 1
 
     def add_one(self, bin_idx: int):
-        self.dgims[bin_idx].add_one()
+        self.dgims[bin_idx].add_one(self.current_time)
+
+    def add_ones(self, bin_idx: int, n: int):
+        self.dgims[bin_idx].add_ones(n, self.current_time)
 
     def count_last(self, bin_idx: int, k: Optional[int] = None) -> int:
-        return self.dgims[bin_idx].count_last(k)
+        return self.dgims[bin_idx].count_last(self.current_time, k)
+
+    def count_last_all(self, k: Optional[int] = None) -> np.ndarray:
+        """Counts of the last k events of every bin, as an int64 array indexed by bin."""
+        current_time = self.current_time
+        return np.fromiter((d.count_last(current_time, k) for d in self.dgims), dtype=np.int64,
+                           count=len(self.dgims))
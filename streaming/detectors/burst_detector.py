@@ -2,8 +2,11 @@
 from typing import Iterable, Tuple, List, Dict, Optional
 import random
 
+import numpy as np
+
 from streaming.algorithms import CountMinSketch, DGIMManager
 from streaming.utils.reservoir import Reservoir, Reservoir
+from streaming.utils.token_handler import encode_tokens
 
 
 class BurstDetector:
@@ -23,22 +26,49 @@ class BurstDetector:
         self.dgim = DGIMManager(num_bins=self.cms.width, window_size=window_size)
         self.reservoirs: List[Reservoir] = [Reservoir() for _ in range(self.cms.width)]
         self.window_size = window_size
+        # (recent, previous) bin counts per (recent_k, prev_k), valid until the next observed message
+        self._counts_cache: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
 
     def observe_message(self, message: str):
-        tokens = message.split()
+        self.observe_tokens(message.split())
+
+    def observe_tokens(self, tokens: List[str], tokens_bytes: Optional[List[bytes]] = None):
+        """Process an already split message; tokens_bytes are the UTF-8 encoded tokens if the caller has them."""
+        if tokens_bytes is None:
+            tokens_bytes = encode_tokens(tokens)
 
         # advance all DGIMs
         self.dgim.tick()
+        self._counts_cache.clear()
+
+        # hash every token once: the batch CMS update returns each token's columns,
+        # which are reused for the DGIM and reservoir updates
+        token_cols = self.cms.add_batch(tokens_bytes)
+        freq_estimates = self.cms._estimate_cols_many(token_cols).tolist()
+
+        # one bulk DGIM insert per touched bin instead of one per (token, row)
+        bins, bin_counts = np.unique(token_cols, return_counts=True)
+        for col, n in zip(bins.tolist(), bin_counts.tolist()):
+            self.dgim.add_ones(col, n)
 
-        # update CMS counts
-        self.cms.add_many(tokens, count=1)
+        reservoirs = self.reservoirs
+        for tok, cols, freq_estimate in zip(tokens, token_cols.tolist(), freq_estimates):
+            for col in cols:
+                # Most offers are rejected, only call into the reservoir when the token would replace its representative
+                reservoir = reservoirs[col]
+                if freq_estimate > reservoir.best_score:
+                    reservoir.add(tok, score=freq_estimate)
 
-        for tok in tokens:
-            for row in range(self.cms.depth):
-                col = self.cms._hash(tok, row) % self.cms.width
-                self.dgim.add_one(col)
-                freq_estimate = self.cms.estimate(tok)
-                self.reservoirs[col].add(tok, score=freq_estimate)
+    def _window_counts(self, recent_k: int, prev_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Recent and previous window counts of all bins, computed once per observed message."""
+        counts = self._counts_cache.get((recent_k, prev_k))
+        if counts is None:
+            # Count all bins at once
+            recent = self.dgim.count_last_all(k=recent_k)
+            prev_total = self.dgim.count_last_all(k=recent_k + prev_k)
+            prev = np.maximum(0, prev_total - recent)  # counts in the previous window
+            counts = self._counts_cache[(recent_k, prev_k)] = (recent, prev)
+        return counts
 
     def detect_spikes(self, recent_k: int = None, prev_k: Optional[int] = None, threshold: float = 2.0, min_count: int = 1) -> List[Dict]:
         """
@@ -54,24 +84,21 @@ class BurstDetector:
         if prev_k is None:
             prev_k = recent_k
 
-        results = []
         eps = 1e-6
-        for col in range(self.cms.width):
-            recent = self.dgim.count_last(col, k=recent_k)
-            prev_total = self.dgim.count_last(col, k=recent_k + prev_k)
-            prev = max(0, prev_total - recent)  # counts in the previous window
-            if recent < min_count:
-                continue
-            ratio = (recent + eps) / (prev + eps)
-            if ratio >= threshold:
-                rep = self.reservoirs[col].representative()
-                results.append({
-                    "bin": col,
-                    "ratio": ratio,
-                    "recent_count": recent,
-                    "prev_count": prev,
-                    "representative": rep,
-                })
+        recent, prev = self._window_counts(recent_k, prev_k)
+        ratio = (recent + eps) / (prev + eps)
+        # Only build results for the flagged bins
+        cols = np.flatnonzero((recent >= min_count) & (ratio >= threshold))
+
+        results = []
+        for col, r, rc, pc in zip(cols.tolist(), ratio[cols].tolist(), recent[cols].tolist(), prev[cols].tolist()):
+            results.append({
+                "bin": col,
+                "ratio": r,
+                "recent_count": rc,
+                "prev_count": pc,
+                "representative": self.reservoirs[col].representative(),
+            })
         # sort by significance
         results.sort(key=lambda x: (-x["ratio"], -x["recent_count"]))
         return results
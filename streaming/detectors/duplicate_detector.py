@@ -1,8 +1,18 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from streaming.algorithms._hash import hash128_many, to_bytes
 from streaming.algorithms.bloom_filter import BloomFilter
 from streaming.utils.token_handler import split_preprocessed_tokens
 
+# (low, high) uint64 hash halves of every shingle of a message
+ShingleHashes = Tuple[np.ndarray, np.ndarray]
+
+# Odd 64-bit multiplier of the polynomial shingle hash
+_SHINGLE_MULT = 0x9E3779B97F4A7C15
+
 
 def shingles(tokens: List[str], k: int) -> List[str]:
     """
@@ -10,7 +20,25 @@ def shingles(tokens: List[str], k: int) -> List[str]:
     """
     if k <= 1:
         return tokens
-    return [" ".join(tokens[i : i + k]) for i in range(0, max(0, len(tokens) - k + 1))]
+    # zip over shifted views yields each window as a tuple, without a slice per shingle
+    return [" ".join(window) for window in zip(*(tokens[i:] for i in range(k)))]
+
+
+def shingle_hashes(tokens: List[Union[str, bytes]], k: int, seed: int = 0) -> ShingleHashes:
+    """
+    128-bit hashes of the same n-grams as shingles(), without building the n-gram strings.
+    Tokens may be given as str or already UTF-8 encoded.
+    Every token is hashed once and each window of k token hashes is combined as a polynomial
+    sum(h_j * M^(k-1-j)) mod 2^64 per half, so the token order matters.
+    """
+    lo, hi = hash128_many([to_bytes(t) for t in tokens], seed)
+    if k <= 1 or len(tokens) < k:
+        return (lo, hi) if k <= 1 else (lo[:0], hi[:0])
+    powers = np.array([pow(_SHINGLE_MULT, e, 1 << 64) for e in range(k - 1, -1, -1)], dtype=np.uint64)
+    return (
+        (sliding_window_view(lo, k) * powers).sum(axis=1, dtype=np.uint64),
+        (sliding_window_view(hi, k) * powers).sum(axis=1, dtype=np.uint64),
+    )
 
 
 class DuplicateDetector:
@@ -37,16 +65,18 @@ class DuplicateDetector:
         self.shingle_size = int(shingle_size)
         self.duplicate_threshold = float(duplicate_threshold)
 
-    def _to_shingles(self, text: str) -> List[str]:
+    def _to_shingles(self, text: str) -> ShingleHashes:
         toks = split_preprocessed_tokens(text)
-        return shingles(toks, self.shingle_size)
+        return shingle_hashes(toks, self.shingle_size, self.bloom.seed)
 
     def is_duplicate(self, text: str) -> Tuple[bool, float]:
-        sh = self._to_shingles(text)
-        if not sh:
+        return self._check_shingles(self._to_shingles(text))
+
+    def _check_shingles(self, sh: ShingleHashes) -> Tuple[bool, float]:
+        if not len(sh[0]):
             return False, 0.0
-        hits = sum(1 for s in sh if s in self.bloom)
-        ratio = hits / len(sh)
+        hits = int(self.bloom.contains_many_hashed(*sh).sum())
+        ratio = hits / len(sh[0])
         return ratio >= self.duplicate_threshold, ratio
 
     def observe_message(self, text: str) -> Dict[str, float]:
@@ -54,10 +84,14 @@ class DuplicateDetector:
         Check duplication and then update the Bloom Filter with the message shingles.
         Returns a dict with status and score.
         """
-        is_dup, score = self.is_duplicate(text)
+        return self.observe_tokens(split_preprocessed_tokens(text))
+
+    def observe_tokens(self, tokens: List[str], tokens_bytes: Optional[List[bytes]] = None) -> Dict[str, float]:
+        """Process an already split message; tokens_bytes are the UTF-8 encoded tokens if the caller has them."""
+        sh = shingle_hashes(tokens if tokens_bytes is None else tokens_bytes, self.shingle_size, self.bloom.seed)
+        is_dup, score = self._check_shingles(sh)
         # Update filter after checking
-        sh = self._to_shingles(text)
-        self.bloom.add_many(sh)
+        self.bloom.add_many_hashed(*sh)
         return {"is_duplicate": is_dup, "duplicate_score": score, "fill_ratio": self.bloom.fill_ratio}
 
     def __repr__(self) -> str:
@@ -1,8 +1,8 @@
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 import heapq
 
 from streaming.algorithms.count_min_sketch import CountMinSketch
-from streaming.utils.token_handler import split_preprocessed_tokens
+from streaming.utils.token_handler import encode_tokens, split_preprocessed_tokens
 
 
 class FrequencyDetector:
@@ -25,7 +25,7 @@ class FrequencyDetector:
 
         # Track top K tokens using a min-heap: (count, token)
         self._top_tokens: Dict[str, int] = {}  # token -> approximate count
-        self._heap: List[Tuple[int, str]] = []  # min-heap of (count, token)
+        self._heap: List[Tuple[int, str]] = []  # min-heap of (count, token), may hold stale entries
 
         # Message counter for periodic updates
         self._message_count = 0
@@ -33,51 +33,73 @@ class FrequencyDetector:
     def observe_message(self, text: str) -> None:
         """Process a message and update Count-Min Sketch."""
         # Expecting 'text' to be preprocessed (space-separated tokens)
-        tokens = split_preprocessed_tokens(text)
+        self.observe_tokens(split_preprocessed_tokens(text))
 
-        # Track all tokens in CMS
-        for token in tokens:
-            self.cms.add(token)
+    def observe_tokens(self, tokens: List[str], tokens_bytes: Optional[List[bytes]] = None) -> None:
+        """Process an already split message; tokens_bytes are the UTF-8 encoded tokens if the caller has them."""
+        if tokens_bytes is None:
+            tokens_bytes = encode_tokens(tokens)
+
+        # Track all tokens in CMS with one batched update
+        self.cms.add_batch(tokens_bytes)
 
         self._message_count += 1
 
     def _update_top_tokens(self, tokens: Iterable[str]) -> None:
         """Update the top K tokens tracking."""
+        tokens = list(tokens)
+
+        # Update existing tokens: set intersection with the tracked tokens and one batched CMS lookup
+        hits = list(self._top_tokens.keys() & tokens)
+        if hits:
+            for token, current_count in zip(hits, self.cms.estimate_many(hits).tolist()):
+                if self._top_tokens[token] != current_count:
+                    # The previous heap entry of the token becomes stale and is dropped lazily
+                    self._top_tokens[token] = current_count
+                    heapq.heappush(self._heap, (current_count, token))
+
         for token in tokens:
+            if token in self._top_tokens:
+                continue
             current_count = self.cms.estimate(token)
 
-            if token in self._top_tokens:
-                # Update existing token
-                self._top_tokens[token] = current_count
-            elif len(self._top_tokens) < self.top_k:
+            if len(self._top_tokens) < self.top_k:
                 # Add new token if we haven't reached top_k yet
                 self._top_tokens[token] = current_count
                 heapq.heappush(self._heap, (current_count, token))
             else:
                 # Check if this token should replace the minimum
-                min_count, min_token = self._heap[0]
+                min_count, min_token = self._heap_min()
                 if current_count > min_count:
                     # Replace minimum
                     heapq.heapreplace(self._heap, (current_count, token))
                     del self._top_tokens[min_token]
                     self._top_tokens[token] = current_count
 
-        # Rebuild heap to maintain consistency
-        self._heap = [(count, token) for token, count in self._top_tokens.items()]
-        heapq.heapify(self._heap)
+        # Only rebuild the heap once stale entries outnumber the live ones
+        if len(self._heap) > 2 * len(self._top_tokens):
+            self._heap = [(count, token) for token, count in self._top_tokens.items()]
+            heapq.heapify(self._heap)
+
+    def _heap_min(self) -> Tuple[int, str]:
+        """Smallest live (count, token) heap entry, popping stale entries of updated or evicted tokens."""
+        heap = self._heap
+        while self._top_tokens.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0]
 
     def get_frequency_analysis(self, top_n: int = 10) -> Dict[str, int]:
         """
         Get approximate counts of current top N tokens from CMS.
         Returns dict sorted by frequency (descending).
         """
-        snapshot = {}
-        for token in self._top_tokens.keys():
-            snapshot[token] = self.cms.estimate(token)
+        tokens = list(self._top_tokens)
+        counts = self.cms.estimate_many(tokens).tolist() if tokens else []
 
-        # Sort by count and take top N
-        sorted_items = sorted(snapshot.items(), key=lambda x: x[1], reverse=True)[:top_n]
-        return dict(sorted_items)
+        # Select the top N with a bounded heap instead of sorting every tracked token
+        # (same order as a stable descending sort)
+        top_items = heapq.nlargest(top_n, zip(tokens, counts), key=lambda x: x[1])
+        return dict(top_items)
 
     def periodic_update(self, recent_tokens: Iterable[str]) -> None:
         """
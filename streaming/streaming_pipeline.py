@@ -3,6 +3,7 @@ from typing import Dict, Iterable, List, Optional
 from streaming.detectors.frequency_detector import FrequencyDetector
 from streaming.detectors.burst_detector import BurstDetector
 from streaming.detectors.duplicate_detector import DuplicateDetector
+from streaming.utils.token_handler import encode_tokens, split_preprocessed_tokens
 
 
 class StreamingPipeline:
@@ -27,23 +28,33 @@ class StreamingPipeline:
         self.duplicate_detector = duplicate_detector or DuplicateDetector()
         self.window_size = window_size
 
-    def process_message(self, text: str, frequency_queries: Optional[Iterable[str]] = None) -> Dict:
+    def process_message(
+        self,
+        text: str,
+        frequency_queries: Optional[Iterable[str]] = None,
+        detect_bursts: bool = True,
+    ) -> Dict:
         """
         Process a single message text and return a dict of detector outputs.
 
         frequency_queries: optional list of tokens/phrases to query current estimates for.
+        detect_bursts: run the burst detection after this message; if False, "burst" is an empty list.
         """
+        # Split and encode once, all detectors hash the same token bytes
+        tokens = split_preprocessed_tokens(text)
+        tokens_bytes = encode_tokens(tokens)
+
         # Update detectors
-        self.frequency_detector.observe_message(text)
-        self.burst_detector.observe_message(text)
-        dup_info = self.duplicate_detector.observe_message(text)
+        self.frequency_detector.observe_tokens(tokens, tokens_bytes)
+        self.burst_detector.observe_tokens(tokens, tokens_bytes)
+        dup_info = self.duplicate_detector.observe_tokens(tokens, tokens_bytes)
 
         # Prepare outputs
         freq_out = {}
         if frequency_queries:
             freq_out = self.frequency_detector.estimate_batch(frequency_queries)
 
-        burst_summary = self.burst_detector.detect_spikes()
+        burst_summary = self.burst_detector.detect_spikes() if detect_bursts else []
 
         out = {
             "frequencies": freq_out,
@@ -5,6 +5,9 @@ from typing import List, Optional
 class Reservoir:
     """Tracks the best representative token per bin with limited memory."""
 
+    # One instance per bin: no per-instance __dict__
+    __slots__ = ("best_token", "best_score")
+
     def __init__(self):
         self.best_token: Optional[str] = None
         self.best_score: float = -1  # higher is better
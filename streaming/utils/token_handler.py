@@ -5,5 +5,14 @@ def split_preprocessed_tokens(text: str) -> List[str]:
     """
     Split preprocessed text into tokens.
     Assumes text is already preprocessed and space-separated.
+    str.split() already drops whitespace runs and never returns empty or padded tokens.
     """
-    return [token.strip() for token in text.split() if token.strip()]
+    return text.split() if text else []
+
+
+def encode_tokens(tokens: List[str]) -> List[bytes]:
+    """
+    UTF-8 encode tokens once so every sketch can hash the same bytes.
+    """
+    encode = str.encode
+    return [encode(token, "utf-8", "ignore") for token in tokens]
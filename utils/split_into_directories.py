@@ -1,11 +1,17 @@
 import os
 import shutil
 import random
+from concurrent.futures import ThreadPoolExecutor
 
 
-def split_json_files(source_dir, train_dir, test_dir, train_ratio=0.7, seed=42):
+def _move(source_dir, target_dir, f):
+    shutil.move(os.path.join(source_dir, f), os.path.join(target_dir, f))
+
+
+def split_json_files(source_dir, train_dir, test_dir, train_ratio=0.7, seed=42, n_workers=None):
     """
     Split the JSON files in the source directory into train and test directories
+    Moves are issued from a thread pool (n_workers, defaults to 4 per CPU up to 32) to overlap the syscalls
     """
     random.seed(seed)
 
@@ -20,11 +26,12 @@ def split_json_files(source_dir, train_dir, test_dir, train_ratio=0.7, seed=42):
     train_files = json_files[:split_index]
     test_files = json_files[split_index:]
 
-    for f in train_files:
-        shutil.move(os.path.join(source_dir, f), os.path.join(train_dir, f))
-
-    for f in test_files:
-        shutil.move(os.path.join(source_dir, f), os.path.join(test_dir, f))
+    if n_workers is None:
+        n_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        # Consume the results so a failed move raises here
+        list(executor.map(_move, [source_dir] * len(train_files), [train_dir] * len(train_files), train_files))
+        list(executor.map(_move, [source_dir] * len(test_files), [test_dir] * len(test_files), test_files))
 
     print(f"Moved {len(train_files)} files to {train_dir}")
     print(f"Moved {len(test_files)} files to {test_dir}")